@@ -0,0 +1,37 @@
+import json
+import os
+import tempfile
+import time
+from typing import Any, Optional
+
+DEFAULT_CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or "~/.cache", "codesync")
+
+
+def cache_path(*parts: str) -> str:
+    return os.path.join(os.path.expanduser(DEFAULT_CACHE_DIR), *parts)
+
+
+def cache_read(*parts: str, ttl: Optional[float] = None) -> Any:
+    path = cache_path(*parts)
+    try:
+        if ttl is not None and time.time() - os.stat(path).st_mtime > ttl:
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def cache_write(value: Any, *parts: str) -> None:
+    path = cache_path(*parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write to a temporary file first so concurrent readers never see a
+    # partially written cache entry.
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -1,16 +1,25 @@
 import argparse
+import importlib
+import logging
 import os
 import signal
 import sys
 from typing import Type
 
 from codesync.config import DEFAULT_CONCURRENCY, DEFAULT_SRC_DIR, Config
-from codesync.path import path_glob
+from codesync.path import path_glob, scandir_many
 from codesync.provider import Provider
-from codesync.provider.generic import GenericProvider
-from codesync.provider.github import GitHubProvider
 from codesync.repo.repo_worker_pool import RepoWorkerPool
 
+logger = logging.getLogger(__name__)
+
+# Providers are imported on first use since some of their dependencies (like
+# PyGithub) take a while to import and aren't needed for every run.
+PROVIDERS = {
+    "github.com": "codesync.provider.github.GitHubProvider",
+    "generic": "codesync.provider.generic.GenericProvider",
+}
+
 
 def exit_handler(exit_code: int):
     def handler(_sig, _frame):
@@ -29,6 +38,10 @@ def main():
     parser.add_argument("--config-file", default=None)
     args = parser.parse_args()
 
+    # Each record is written to stdout with a single write under the
+    # handler's lock, so lines from concurrent workers don't interleave.
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
     config = Config()
     config.load_config_file(filepath=args.config_file)
     config.validate()
@@ -37,7 +50,7 @@ def main():
     concurrency = args.concurrency
     if args.concurrency == DEFAULT_CONCURRENCY:
         concurrency = config.get("concurrency", default=DEFAULT_CONCURRENCY)
-    print(f"Concurrency: {concurrency}{' (disabled)' if concurrency == 0 else ''}")
+    logger.info(f"Concurrency: {concurrency}{' (disabled)' if concurrency == 0 else ''}")
     repo_worker_pool = RepoWorkerPool(size=concurrency)
 
     with repo_worker_pool.context():
@@ -56,26 +69,32 @@ def main():
             else:
                 provider.sync_all()
         else:
-            for path, host_name in path_glob(f"{codedir}/*").items():
+            hosts = path_glob(f"{codedir}/*")
+            listings = scandir_many(hosts.keys(), max_workers=concurrency)
+            for path, host_name in hosts.items():
                 ProviderClass = provider_for_host(host_name=host_name)
-                provider = ProviderClass(config=config, path=path, repo_worker_pool=repo_worker_pool)
+                provider = ProviderClass(
+                    config=config, path=path, repo_worker_pool=repo_worker_pool, listing=listings[path]
+                )
                 provider.sync_all()
 
+    if not config.get("git", "clone", "fsync", default=True):
+        # Clones skipped fsyncing their objects, so flush them all at once.
+        os.sync()
+
     if repo_worker_pool.errors:
-        print("*" * 80)
-        print(f"Errors: {len(repo_worker_pool.errors)}")
+        logger.error("*" * 80)
+        logger.error(f"Errors: {len(repo_worker_pool.errors)}")
         for i, error in enumerate(repo_worker_pool.errors, 1):
-            print(f"{i}:\t".ljust(75, "*"))
-            print("Job: ", error.job)
-            print("Exception: ", error.exc)
+            logger.error(f"{i}:\t".ljust(75, "*"))
+            logger.error(f"Job:  {error.job}")
+            logger.error(f"Exception:  {error.exc}")
         sys.exit(1)
 
 
 def provider_for_host(host_name: str) -> Type[Provider]:
-    return {
-        "github.com": GitHubProvider,
-        "generic": GenericProvider,
-    }.get(host_name, GenericProvider)
+    module_name, _, class_name = PROVIDERS.get(host_name, PROVIDERS["generic"]).rpartition(".")
+    return getattr(importlib.import_module(module_name), class_name)
 
 
 if __name__ == "__main__":
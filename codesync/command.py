@@ -1,7 +1,13 @@
-import os
+import logging
+import shlex
+import subprocess
+from typing import Mapping, Optional, Sequence
 
+logger = logging.getLogger(__name__)
 
-def run_command(cmd, dry_run=False):
-    print(cmd)
-    if not dry_run:
-        os.system(cmd)
+
+def run_command(argv: Sequence[str], dry_run=False, env: Optional[Mapping[str, str]] = None) -> int:
+    logger.info(shlex.join(argv))
+    if dry_run:
+        return 0
+    return subprocess.run(argv, check=False, env=env).returncode
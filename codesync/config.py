@@ -1,34 +1,39 @@
+import functools
 import json
-import operator
+import logging
 import os
 import re
 import sys
-from functools import reduce
-from typing import Any, Iterable, Optional
+from typing import TYPE_CHECKING, Any, Iterable, Optional
 
 if sys.version_info < (3, 9):
     import importlib_resources
 else:
     import importlib.resources as importlib_resources
 
-import jsonschema
-import more_itertools
-import ruyaml
-from mergedeep import merge
-
 from codesync import VERSION, RepoCloneScheme
 
+if TYPE_CHECKING:
+    from jsonschema.protocols import Validator
+
+logger = logging.getLogger(__name__)
+
 DEFAULT_SRC_DIR = "~/src"
 DEFAULT_DEFAULT_BRANCH = "main"  # lovely name
 DEFAULT_REPO_CLONE_SCHEME: RepoCloneScheme = "https"
 DEFAULT_CONCURRENCY = os.cpu_count() or 4
 
+# Marks a config lookup that found nothing, since None is a valid value.
+MISSING = object()
+
 default_config = {
     "version": VERSION,
     "src_dir": DEFAULT_SRC_DIR,
     "concurrency": DEFAULT_CONCURRENCY,
     "git": {
-        "clone": {"args": []},
+        "min_fetch_interval": 0,
+        "ssh": {"multiplex": False},
+        "clone": {"args": [], "fsync": True},
         "fetch": {"args": []},
         "pull": {"args": []},
     },
@@ -43,6 +48,7 @@ default_config = {
             },
         },
         "github.com": {
+            "cache": {"ttl": 0},
             "orgs": {
                 "/.*/": {
                     "default_branches": [DEFAULT_DEFAULT_BRANCH],
@@ -51,6 +57,7 @@ default_config = {
                             "enabled": True,
                             "default_branch": DEFAULT_DEFAULT_BRANCH,
                             "clone_scheme": DEFAULT_REPO_CLONE_SCHEME,
+                            "skip_unchanged": False,
                             "actions": {
                                 "active": ["pull"],
                                 "archived": [],
@@ -65,37 +72,96 @@ default_config = {
 }
 
 
+def deep_merge(destination: dict, source: dict) -> dict:
+    """Merge source into destination in place, replacing non-dict values."""
+    stack = [(destination, source)]
+    while stack:
+        into, values = stack.pop()
+        for key, value in values.items():
+            if isinstance(value, dict) and isinstance(into.get(key), dict):
+                stack.append((into[key], value))
+            else:
+                into[key] = value
+    return destination
+
+
+def flatten(config: dict) -> dict[tuple, Any]:
+    """Map every key path in a nested config dict to the value it points to."""
+    index: dict[tuple, Any] = {(): config}
+    stack: list[tuple[tuple, dict]] = [((), config)]
+    while stack:
+        prefix, node = stack.pop()
+        for key, value in node.items():
+            path = (*prefix, key)
+            index[path] = value
+            if isinstance(value, dict):
+                stack.append((path, value))
+    return index
+
+
+@functools.lru_cache(maxsize=None)
+def schema_validator(version: float) -> "Validator":
+    """Build a validator for the schema of the given config version once."""
+    # jsonschema is slow to import and only needed here.
+    import jsonschema
+
+    schema = json.loads(importlib_resources.files("codesync.schemas").joinpath(f"codesync-{version}.json").read_text())
+    cls = jsonschema.validators.validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+
+@functools.lru_cache(maxsize=1024)
+def regex_key_pattern(regex_key: str) -> "re.Pattern[str]":
+    """Compile a `/pattern/flags` config key into a regex."""
+    parts = regex_key.split("/")
+    flags = parts[-1]
+    if flags:
+        flags = f"(?{flags})"
+    pattern = "/".join(parts[1:-1])
+    return re.compile(f"{flags}{pattern}")
+
+
 class Config:
     def __init__(self, config: Optional[dict] = None) -> None:
         if not config:
             config = default_config
         self.config = config
+        self._index: Optional[dict[tuple, Any]] = None
+        self._cache: dict[tuple, Any] = {}
+        self._regex_keys: dict[tuple, list[tuple[str, re.Pattern[str]]]] = {}
 
     def load_config_file(self, filepath: Optional[str] = None):
         if not filepath:
             filepath = os.path.join(os.path.expanduser("~"), ".codesync.yaml")
         if os.path.exists(filepath):
+            import ruyaml
+
             with open(filepath, "r") as f:
-                self.config = merge(self.config, ruyaml.safe_load(f))
+                self.config = deep_merge(self.config, ruyaml.safe_load(f) or {})
+            self._index = None
+            self._cache = {}
+            self._regex_keys = {}
 
     def validate(self) -> None:
         config_version = self.config["version"]
-        print(f"Checking config (version {config_version}).")
+        logger.info(f"Checking config (version {config_version}).")
         if config_version > VERSION:
             raise Exception(
                 "codesync: fatal: configuration file version is higher than what this version of codesync can handle"
             )
-        schema = json.loads(
-            importlib_resources.files("codesync.schemas").joinpath(f"codesync-{config_version}.json").read_text()
-        )
-        jsonschema.validate(instance=self.config, schema=schema)
-        print("Config is valid.")
+        schema_validator(config_version).validate(self.config)
+        logger.info("Config is valid.")
+
+    def index(self) -> dict[tuple, Any]:
+        # The config doesn't change once it's loaded, so every path is
+        # resolved up front and lookups become a single dict access.
+        if self._index is None:
+            self._index = flatten(self.config)
+        return self._index
 
     def get_raw(self, *path: Iterable[str], default: Any = None) -> Any:
-        try:
-            return reduce(operator.getitem, path, self.config)  # type:ignore
-        except (KeyError, TypeError):
-            return default
+        return self.index().get(path, default)
 
     def get(
         self,
@@ -105,43 +171,57 @@ class Config:
     ) -> Any:
         if not keys:
             return self.get_raw(*path, default=default)
-        key_groups = list(more_itertools.split_at(path, lambda k: k == "{}", 1))
-        before_keys, after_keys = [], []
-        if len(key_groups) == 1:
-            before_keys = key_groups[0]
-        elif len(key_groups) == 2:
-            before_keys, after_keys = key_groups
+        # Every repo asks the same handful of questions, so remember the
+        # outcome of each lookup (including misses) for the rest of the run.
+        cache_key = (path, tuple(keys))
+        try:
+            value = self._cache[cache_key]
+        except KeyError:
+            value = self._cache[cache_key] = self.resolve(*path, keys=keys)
+        return default if value is MISSING else value
+
+    def regex_keys(self, *path: Iterable[str]) -> list[tuple[str, "re.Pattern[str]"]]:
+        """Regex keys under path, most specific (longest) first."""
+        try:
+            return self._regex_keys[path]
+        except KeyError:
+            pass
+        parent = self.get_raw(*path)
+        regex_keys = []
+        if isinstance(parent, dict):
+            regex_keys = sorted(
+                [(key, regex_key_pattern(key)) for key in parent if isinstance(key, str) and key.startswith("/")],
+                key=lambda regex_key: len(regex_key[0]),
+                reverse=True,
+            )
+        self._regex_keys[path] = regex_keys
+        return regex_keys
+
+    def resolve(self, *path: Iterable[str], keys: Iterable[str]) -> Any:
+        try:
+            i = path.index("{}")
+            before_keys, after_keys = path[:i], path[i + 1 :]
+        except ValueError:
+            before_keys, after_keys = path, ()
         key, *child_keys = keys
         parent = self.get_raw(*before_keys)
         if not isinstance(parent, dict):
-            return default
+            return MISSING
         if key in parent:
             if child_keys:
-                return self.get(*before_keys, key, *after_keys, keys=child_keys, default=default)
+                return self.get(*before_keys, key, *after_keys, keys=child_keys, default=MISSING)
             else:
-                return self.get_raw(*before_keys, key, *after_keys, default=default)
-        regex_keys = sorted(
-            [regex_key for regex_key in parent if regex_key.startswith("/")],
-            key=len,
-            reverse=True,
-        )
-        for regex_key in regex_keys:
-            if not isinstance(regex_key, str):
-                continue
-            parts = regex_key.split("/")
-            flags = parts[-1]
-            if flags:
-                flags = f"(?{flags})"
-            pattern = "/".join(parts[1:-1])
-            if re.fullmatch(f"{flags}{pattern}", key):
+                return self.get_raw(*before_keys, key, *after_keys, default=MISSING)
+        for regex_key, pattern in self.regex_keys(*before_keys):
+            if pattern.fullmatch(key):
                 if child_keys:
                     return self.get(
                         *before_keys,
                         regex_key,
                         *after_keys,
                         keys=child_keys,
-                        default=default,
+                        default=MISSING,
                     )
                 else:
-                    return self.get_raw(*before_keys, regex_key, *after_keys, default=default)
-        return default
+                    return self.get_raw(*before_keys, regex_key, *after_keys, default=MISSING)
+        return MISSING
@@ -1,48 +1,166 @@
+import functools
+import logging
 import os
-import re
+import shlex
 import subprocess
+import tempfile
 from typing import Iterable, Optional
 
+from codesync.cache import cache_path
 from codesync.command import run_command
 from codesync.config import Config
 
+logger = logging.getLogger(__name__)
+
+HEAD_REF_PREFIX = b"ref: refs/heads/"
+# HEAD is a single line; this comfortably fits any branch name git allows
+# in practice.
+HEAD_READ_SIZE = 4096
+SSH_CONTROL_PERSIST = 60
+# ControlPath is a Unix socket, whose path can be at most 104 bytes on macOS
+# and the BSDs (108 on Linux). %C expands to a 40 character hash, and ssh
+# appends a 17 character suffix while it sets up the socket.
+SSH_CONTROL_PATH_MAX = 104
+SSH_CONTROL_PATH_SUFFIX_LENGTH = 1 + 40 + 17
+
 
 def _check_output(cmd: Iterable[str], *args, **kwargs):
-    print(" ".join(cmd))
+    logger.info(shlex.join(cmd))
     return subprocess.check_output(args=cmd, *args, **kwargs)  # type: ignore
 
 
+def _git_args(config: Config, command: str) -> list[str]:
+    # Extra args used to be interpolated into a shell command, so keep
+    # splitting them the same way a shell would.
+    return shlex.split(" ".join(config.get("git", command, "args", default=[])))
+
+
+@functools.lru_cache(maxsize=None)
+def _ssh_control_dir(control_dir: str) -> Optional[str]:
+    if len(os.fsencode(control_dir)) + SSH_CONTROL_PATH_SUFFIX_LENGTH >= SSH_CONTROL_PATH_MAX:
+        logger.warning(f"[WARN] {control_dir} is too long for SSH control sockets, not multiplexing SSH connections")
+        return None
+    os.makedirs(control_dir, mode=0o700, exist_ok=True)
+    return control_dir
+
+
+@functools.lru_cache(maxsize=None)
+def _user_ssh_command_configured() -> bool:
+    # Run outside of any repo so only the user's and the system's config
+    # count, not whichever repo codesync happens to be started from.
+    with tempfile.TemporaryDirectory() as cwd:
+        result = subprocess.run(
+            ["git", "config", "--get", "core.sshCommand"],
+            cwd=cwd,
+            env={**os.environ, "GIT_CEILING_DIRECTORIES": os.path.dirname(cwd)},
+            capture_output=True,
+            check=False,
+        )
+    return result.returncode == 0 and bool(result.stdout.strip())
+
+
+def _repo_ssh_command_configured(repo_path: str) -> bool:
+    # Read the repo's own config directly rather than starting another git
+    # process for every fetch and pull.
+    try:
+        with open(os.path.join(repo_path, ".git", "config"), "r") as f:
+            lines = f.readlines()
+    except OSError:
+        return False
+    section = None
+    for line in lines:
+        line = line.strip()
+        if line.startswith("["):
+            section = line[1 : line.find("]")].strip().lower()
+        elif section == "core" and line.split("=", 1)[0].strip().lower() == "sshcommand":
+            return True
+    return False
+
+
+def _git_env(config: Config, repo_path: Optional[str] = None) -> Optional[dict[str, str]]:
+    if not config.get("git", "ssh", "multiplex", default=False):
+        return None
+    # GIT_SSH_COMMAND overrides core.sshCommand too, so don't get in the way
+    # of an SSH setup the user already has.
+    if "GIT_SSH_COMMAND" in os.environ or "GIT_SSH" in os.environ:
+        return None
+    if _user_ssh_command_configured() or (repo_path and _repo_ssh_command_configured(repo_path)):
+        return None
+    # Share one SSH connection per host between every clone, fetch and pull
+    # so each of them doesn't have to set up its own connection and auth.
+    control_dir = _ssh_control_dir(cache_path("ssh"))
+    if control_dir is None:
+        return None
+    ssh_command = shlex.join(
+        [
+            "ssh",
+            "-o",
+            "ControlMaster=auto",
+            "-o",
+            f"ControlPath={os.path.join(control_dir, '%C')}",
+            "-o",
+            f"ControlPersist={SSH_CONTROL_PERSIST}",
+        ]
+    )
+    return {**os.environ, "GIT_SSH_COMMAND": ssh_command}
+
+
 def git_clone(config: Config, clone_url: str, destination: str):
-    args = " ".join(config.get("git", "clone", "args", default=[]))
-    run_command(f"git clone --recurse-submodules {clone_url} {destination} {args}")
+    git = ["git"]
+    if not config.get("git", "clone", "fsync", default=True):
+        git.extend(["-c", "core.fsync=none"])
+    run_command(
+        [*git, "clone", "--recurse-submodules", clone_url, destination, *_git_args(config, "clone")],
+        env=_git_env(config),
+    )
 
 
 def git_fetch(config: Config, repo_path: str):
-    args = " ".join(config.get("git", "fetch", "args", default=[]))
-    run_command(f"git -C {repo_path} fetch {args}")
+    run_command(["git", "-C", repo_path, "fetch", *_git_args(config, "fetch")], env=_git_env(config, repo_path))
 
 
 def git_pull(config: Config, repo_path: str):
-    args = " ".join(config.get("git", "pull", "args", default=[]))
-    run_command(f"git -C {repo_path} pull {args}")
+    run_command(["git", "-C", repo_path, "pull", *_git_args(config, "pull")], env=_git_env(config, repo_path))
 
 
-def git_clean(repo_path: str):
+def git_clean(repo_path: str, head_branch: Optional[str] = None):
     refs_out = _check_output(
         ["git", "-C", repo_path, "for-each-ref", "--format", "%(refname:short) %(upstream:track)"]
     )
     refs: list[str] = refs_out.decode("utf-8").strip().split("\n")
-    for ref in refs:
-        if ref.endswith("[gone]"):
-            ref = ref.removesuffix("[gone]").strip()
-            if repo_head_branch(repo_path) != ref:
-                print(_check_output(["git", "-C", repo_path, "branch", "-D", ref]))
+    if head_branch is None:
+        head_branch = repo_head_branch(repo_path)
+    gone_refs = [ref.removesuffix("[gone]").strip() for ref in refs if ref.endswith("[gone]")]
+    gone_refs = [ref for ref in gone_refs if ref != head_branch]
+    if gone_refs:
+        # One `git branch -D` for every gone branch instead of a process each.
+        logger.info(_check_output(["git", "-C", repo_path, "branch", "-D", *gone_refs]).decode("utf-8").strip())
+
+
+def git_up_to_date(repo_path: str) -> bool:
+    """Whether the checked out branch already contains everything fetched from its upstream."""
+    result = subprocess.run(
+        ["git", "-C", repo_path, "merge-base", "--is-ancestor", "@{upstream}", "HEAD"],
+        capture_output=True,
+        check=False,
+    )
+    return result.returncode == 0
+
+
+def repo_fetched_at(repo_path: str) -> Optional[float]:
+    try:
+        return os.stat(os.path.join(repo_path, ".git", "FETCH_HEAD")).st_mtime
+    except OSError:
+        return None
 
 
 def repo_head_branch(repo_path: str) -> Optional[str]:
-    with open(os.path.join(repo_path, ".git", "HEAD"), "r") as head_file:
-        head = head_file.readline().strip()
-    head_parse = re.search("^ref: refs/heads/(.*)$", head)
-    if not head_parse:
+    # A raw read skips the buffered text file wrapper for what is a tiny file.
+    fd = os.open(os.path.join(repo_path, ".git", "HEAD"), os.O_RDONLY)
+    try:
+        head = os.read(fd, HEAD_READ_SIZE).split(b"\n", 1)[0].strip()
+    finally:
+        os.close(fd)
+    if not head.startswith(HEAD_REF_PREFIX):
         return
-    return head_parse[1]
+    return head.removeprefix(HEAD_REF_PREFIX).decode("utf-8")
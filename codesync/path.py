@@ -1,6 +1,87 @@
 import os
+import shutil
+import stat
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
 from glob import glob
+from typing import Any, Callable, Iterable
+
+
+def has_magic(path: str) -> bool:
+    return any(c in path for c in "*?[")
 
 
 def path_glob(path: str) -> dict[str, str]:
-    return dict([(str(d), str(os.path.split(d)[-1])) for d in glob(path) if os.path.isdir(d)])
+    parent, pattern = os.path.split(path)
+    if not pattern:
+        return dict([(str(d), str(os.path.split(d)[-1])) for d in glob(path) if os.path.isdir(d)])
+    if has_magic(parent):
+        # Expand one level at a time so every level gets the scandir path.
+        dirs = {}
+        for parent_dir in path_glob(parent):
+            dirs.update(path_glob(os.path.join(parent_dir, pattern)))
+        return dirs
+    if not has_magic(pattern):
+        return {path: pattern} if os.path.isdir(path) else {}
+    # Listing the parent once with scandir gets the name and (usually) the
+    # file type of every entry from the same syscall, where glob + isdir
+    # needs an extra stat for every match.
+    dirs = {}
+    try:
+        with os.scandir(parent or os.curdir) as entries:
+            for entry in entries:
+                if entry.name.startswith(".") and not pattern.startswith("."):
+                    # glob skips hidden entries unless asked for them
+                    continue
+                if pattern != "*" and not fnmatch(entry.name, pattern):
+                    continue
+                if entry.is_dir():
+                    dirs[os.path.join(parent, entry.name)] = entry.name
+    except OSError:
+        return {}
+    return dirs
+
+
+def scandir_many(paths: Iterable[str], max_workers: int) -> dict[str, dict[str, str]]:
+    """List the directories in each of paths, scanning several at once."""
+    paths = list(paths)
+    # Directory scans spend most of their time blocked on the filesystem
+    # (especially on cold caches and network mounts), so overlap them.
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(paths)))) as executor:
+        return dict(zip(paths, executor.map(lambda path: path_glob(os.path.join(path, "*")), paths)))
+
+
+def _make_writable_and_retry(func: Callable[[str], Any], path: str, exc: Any) -> None:
+    if isinstance(exc, tuple):
+        # onerror (before Python 3.12) passes sys.exc_info()
+        exc = exc[1]
+    if not isinstance(exc, PermissionError) or func not in (os.unlink, os.rmdir, os.open):
+        raise exc
+    if func is os.open:
+        # A directory that can't be listed; let ourselves in and remove it
+        # separately, since rmtree moves on without it.
+        os.chmod(path, os.stat(path).st_mode | stat.S_IRWXU)
+        remove_tree(path)
+        return
+    if os.name == "nt":
+        # Windows refuses to delete read-only files.
+        os.chmod(path, os.stat(path).st_mode | stat.S_IWRITE)
+    else:
+        # Removing an entry needs write access to the directory it's in, which
+        # git's read-only pack directories (and some checkouts) don't have.
+        parent = os.path.dirname(path)
+        os.chmod(parent, os.stat(parent).st_mode | stat.S_IRWXU)
+    func(path)
+
+
+def remove_tree(path: str) -> None:
+    if os.path.islink(path):
+        # Repos can be symlinked into place, and like rm -rf only the link
+        # itself goes away.
+        os.unlink(path)
+        return
+    if sys.version_info >= (3, 12):
+        shutil.rmtree(path, onexc=_make_writable_and_retry)
+    else:
+        shutil.rmtree(path, onerror=_make_writable_and_retry)
@@ -1,6 +1,6 @@
 import abc
 import os
-from typing import Iterable
+from typing import Iterable, Optional
 
 from codesync.config import Config
 from codesync.path import path_glob
@@ -8,15 +8,26 @@ from codesync.repo.repo_worker_pool import RepoWorkerPool
 
 
 class Provider(abc.ABC):
-    def __init__(self, config: Config, path: str, repo_worker_pool: RepoWorkerPool) -> None:
+    def __init__(
+        self,
+        config: Config,
+        path: str,
+        repo_worker_pool: RepoWorkerPool,
+        listing: Optional[dict[str, str]] = None,
+    ) -> None:
         self.config = config
         self.path = path
         self.repo_worker_pool = repo_worker_pool
+        # Directories directly under path, when they were already scanned up
+        # front.
+        self.listing = listing
 
     def path_join(self, *paths: Iterable[str]) -> str:
         return os.path.join(self.path, *paths)  # type: ignore
 
     def path_glob(self, path: str) -> dict[str, str]:
+        if path == "*" and self.listing is not None:
+            return self.listing
         return path_glob(self.path_join(path))
 
     @abc.abstractmethod
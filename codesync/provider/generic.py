@@ -1,3 +1,6 @@
+import logging
+from typing import Optional
+
 from codesync import RepoAction
 from codesync.config import DEFAULT_DEFAULT_BRANCH, Config
 from codesync.provider import Provider
@@ -5,12 +8,20 @@ from codesync.provider_config.generic import GenericProviderConfig
 from codesync.repo.repo_worker_pool import RepoWorkerPool
 from codesync.repo.synced_repo import SyncedRepo
 
+logger = logging.getLogger(__name__)
+
 
 class GenericProvider(Provider):
     provider = "generic"
 
-    def __init__(self, config: Config, path: str, repo_worker_pool: RepoWorkerPool) -> None:
-        super().__init__(config=config, path=path, repo_worker_pool=repo_worker_pool)
+    def __init__(
+        self,
+        config: Config,
+        path: str,
+        repo_worker_pool: RepoWorkerPool,
+        listing: Optional[dict[str, str]] = None,
+    ) -> None:
+        super().__init__(config=config, path=path, repo_worker_pool=repo_worker_pool, listing=listing)
         self.provider_config = GenericProviderConfig(config=config)
 
     def sync_all(self) -> None:
@@ -20,7 +31,7 @@ class GenericProvider(Provider):
         for repo_path, repo_name in self.path_glob(path=path).items():
             repo_config = self.provider_config.repo(repo_name)
             if not repo_config.get("enabled"):
-                print(f"{repo_path}: enabled=False")
+                logger.info(f"{repo_path}: enabled=False")
                 continue
             state = repo_config.get("state", default="active")
             actions: list[RepoAction] = repo_config.get("actions", state, default=[])
@@ -32,6 +43,8 @@ class GenericProvider(Provider):
                 actions=actions,
                 repo_path=repo_path,
                 state=state,
-                default_branches=set([default_branch]),
+                default_branches=frozenset([default_branch]),
+                # repo_path came from scanning the provider directory
+                exists_locally=True,
             )
             self.repo_worker_pool.push(synced_repo.job())
@@ -1,18 +1,54 @@
+import logging
 import os
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from typing import Any, Callable, Iterable, Optional, cast
+from datetime import datetime, timezone
+from functools import cached_property, partial
+from typing import Any, Callable, Iterable, Iterator, Optional, TypeVar, cast
 
-import more_itertools
-from github import Github, UnknownObjectException
+from github import Github, RateLimitExceededException, UnknownObjectException
+from github.PaginatedList import PaginatedList
 from github.Repository import Repository
 
 from codesync import RepoAction, RepoState
+from codesync.cache import cache_read, cache_write
 from codesync.config import DEFAULT_DEFAULT_BRANCH, DEFAULT_REPO_CLONE_SCHEME, Config
 from codesync.provider import Provider
 from codesync.provider_config.github import GitHubProviderConfig
 from codesync.repo.repo_worker_pool import RepoWorkerPool, RepoWorkerPoolJob
 from codesync.repo.synced_repo import SyncedRepo
-from codesync.worker_pool import WorkerPool
+from codesync.worker_pool import JobError, WorkerPool
+
+logger = logging.getLogger(__name__)
+
+# Largest page size the GitHub REST API allows.
+GITHUB_PER_PAGE = 100
+# Hold off on new requests once this few remain until the rate limit resets.
+GITHUB_RATE_LIMIT_THRESHOLD = 10
+GITHUB_RATE_LIMIT_RETRIES = 3
+# Keep concurrent org listings low to stay clear of secondary rate limits.
+GITHUB_MAX_ORG_CONCURRENCY = 4
+
+T = TypeVar("T")
+
+
+def github_timestamp(value: Optional[datetime]) -> Optional[float]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        # older PyGithub versions hand back naive UTC datetimes
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def repo_topics(repo: Repository) -> list[str]:
+    # Repo listings already include topics, so this avoids a separate topics
+    # request per repo. PyGithub only exposes them as an attribute since 1.56.
+    if hasattr(repo, "topics"):
+        return repo.topics
+    return repo.get_topics()
 
 
 @dataclass
@@ -20,33 +56,45 @@ class GitHubRepoProcessorJob:
     config: Config
     org_name: str
     repo_name: str
-    state: RepoState
+    # When unknown up front, state_function is called on the processor pool
+    # to look it up.
+    state: Optional[RepoState]
     repo_path: str
     push_function: Callable[[RepoWorkerPoolJob], Any]
     topics: Optional[Iterable[str]] = None
     repo: Optional[Repository] = None
     repo_clone_url: Optional[str] = None
+    exists_locally: Optional[bool] = None
+    state_function: Optional[Callable[[], RepoState]] = None
+    provider_config: Optional[GitHubProviderConfig] = None
 
-    def org_config(self):
-        return GitHubProviderConfig(config=self.config).org(self.org_name)
+    # Each job asks its org and repo config several questions, so build the
+    # scoped configs once rather than on every lookup.
+    @cached_property
+    def org_config(self) -> GitHubProviderConfig:
+        provider_config = self.provider_config or GitHubProviderConfig(config=self.config)
+        return provider_config.org(self.org_name)
 
-    def repo_config(self):
-        return self.org_config().repo(self.repo_name)
+    @cached_property
+    def repo_config(self) -> GitHubProviderConfig:
+        return self.org_config.repo(self.repo_name)
 
     def synced_repo(self) -> Optional[SyncedRepo]:
         repo = self.repo
         org_name = self.org_name
         repo_name = self.repo_name
         full_name = f"{org_name}/{repo_name}"
-        enabled = self.repo_config().get("enabled")
+        enabled = self.repo_config.get("enabled")
         if not enabled:
-            print(f"{GitHubProvider.provider}/{full_name}: enabled=False")
+            logger.info(f"{GitHubProvider.provider}/{full_name}: enabled=False")
             return
+        if self.state is None and self.state_function is not None:
+            self.state = self.state_function()
         state = self.state
         topics = self.topics
         if not topics:
             if repo:
-                topics = repo.get_topics()
+                topics = repo_topics(repo)
             else:
                 topics = []
         repo_path = self.repo_path
@@ -55,14 +103,17 @@ class GitHubRepoProcessorJob:
             repo_clone_url = {
                 "https": repo.clone_url,
                 "ssh": repo.ssh_url,
-            }.get(self.repo_config().get("clone_scheme", default=DEFAULT_REPO_CLONE_SCHEME))
-        state = self.repo_config().get("state", default=state)
+            }.get(self.repo_config.get("clone_scheme", default=DEFAULT_REPO_CLONE_SCHEME))
+        state = self.repo_config.get("state", default=state)
         actions = self.repo_actions_get(repo_name=repo_name, state=state, topics=topics)
-        default_branch = self.repo_config().get("default_branch")
-        default_branches = set(
+        pushed_at = None
+        if repo is not None and self.repo_config.get("skip_unchanged"):
+            pushed_at = github_timestamp(repo.pushed_at)
+        default_branch = self.repo_config.get("default_branch")
+        default_branches = frozenset(
             [default_branch]
             if default_branch
-            else self.org_config().get("default_branches", default=[DEFAULT_DEFAULT_BRANCH])
+            else self.org_config.get("default_branches", default=[DEFAULT_DEFAULT_BRANCH])
         )
         return SyncedRepo(
             config=self.config,
@@ -74,6 +125,8 @@ class GitHubRepoProcessorJob:
             repo_path=repo_path,
             repo_clone_url=repo_clone_url,
             full_name=full_name,
+            pushed_at=pushed_at,
+            exists_locally=self.exists_locally,
         )
 
     def repo_actions_get(
@@ -87,19 +140,16 @@ class GitHubRepoProcessorJob:
             default = []
         if topics is None:
             topics = []
-        specific_repo_actions = self.org_config().get("repos", repo_name, "actions", state)
+        org_config = self.org_config
+        specific_repo_actions = org_config.get("repos", repo_name, "actions", state)
         if specific_repo_actions:
             return specific_repo_actions
-        topic_actions = [
-            a
-            for a in set(
-                more_itertools.collapse([self.org_config().topic(topic).get("actions", state) for topic in topics])
-            )
-            if a is not None
-        ]
+        topic_actions: set[RepoAction] = set()
+        for topic in topics:
+            topic_actions.update(org_config.topic(topic).get("actions", state, default=[]))
         if topic_actions:
-            return topic_actions
-        return self.repo_config().get("actions", state, default=default)
+            return list(topic_actions)
+        return self.repo_config.get("actions", state, default=default)
 
 
 class GitHubRepoProcessorWorkerPool(WorkerPool):
@@ -115,41 +165,191 @@ class GitHubRepoProcessorWorkerPool(WorkerPool):
 class GitHubProvider(Provider):
     provider = "github.com"
 
-    def __init__(self, config: Config, path: str, repo_worker_pool: RepoWorkerPool) -> None:
-        super().__init__(config=config, path=path, repo_worker_pool=repo_worker_pool)
+    def __init__(
+        self,
+        config: Config,
+        path: str,
+        repo_worker_pool: RepoWorkerPool,
+        listing: Optional[dict[str, str]] = None,
+    ) -> None:
+        super().__init__(config=config, path=path, repo_worker_pool=repo_worker_pool, listing=listing)
         self.provider_config = GitHubProviderConfig(config=config)
-        self.github = Github(self.provider_config.get("auth", "token", default=os.environ.get("GITHUB_TOKEN")))
+        self.github = Github(
+            self.provider_config.get("auth", "token", default=os.environ.get("GITHUB_TOKEN")),
+            per_page=GITHUB_PER_PAGE,
+            # Keep a connection around for every thread that can talk to the
+            # API at once, so requests don't pay for a new TLS handshake after
+            # the default pool of 10 overflows.
+            pool_size=repo_worker_pool.size + GITHUB_MAX_ORG_CONCURRENCY,
+        )
         self.repo_processor_worker_pool = GitHubRepoProcessorWorkerPool(size=repo_worker_pool.size)
+        # Report failures while resolving repos alongside the git failures
+        # instead of only printing their tracebacks.
+        self.repo_processor_worker_pool.errors = repo_worker_pool.errors
+
+    def get_org_repos(self, org_name: str) -> Iterator[Repository]:
+        ttl = self.provider_config.get("cache", "ttl", default=0)
+        if not ttl:
+            yield from self.fetch_org_repos(org_name=org_name)
+            return
+        cached = cache_read(self.provider, "orgs", f"{org_name}.json", ttl=ttl)
+        if cached is not None:
+            for raw_data in cached:
+                yield self.github.create_from_raw_data(Repository, raw_data)
+            return
+        repos = []
+        for repo in self.fetch_org_repos(org_name=org_name):
+            repos.append(repo)
+            yield repo
+        try:
+            cache_write([self.repo_cache_data(repo) for repo in repos], self.provider, "orgs", f"{org_name}.json")
+        except OSError as e:
+            # The listing itself went fine, so carry on without caching it.
+            logger.warning(f"[WARN] {self.provider}/{org_name}: could not cache repo listing: {e}")
+
+    def repo_cache_data(self, repo: Repository) -> dict[str, Any]:
+        # Only keep what the sync needs. Everything here is already part of the
+        # repo listing response, so reading it never triggers a lazy fetch.
+        pushed_at = github_timestamp(repo.pushed_at)
+        return {
+            "name": repo.name,
+            "full_name": repo.full_name,
+            "url": repo.url,
+            "archived": repo.archived,
+            "clone_url": repo.clone_url,
+            "ssh_url": repo.ssh_url,
+            "topics": repo_topics(repo),
+            "pushed_at": (
+                datetime.fromtimestamp(pushed_at, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+                if pushed_at is not None
+                else None
+            ),
+        }
 
-    def get_org_repos(self, org_name: str) -> Iterable[Repository]:
-        user = self.github.get_user(org_name)
+    def fetch_org_repos(self, org_name: str) -> Iterator[Repository]:
+        user = self.call_with_rate_limit(lambda: self.github.get_user(org_name))
         if user.type == "Organization":
-            org = self.github.get_organization(org_name)
-            return org.get_repos()
+            org = self.call_with_rate_limit(lambda: self.github.get_organization(org_name))
+            # Hand repos out a page at a time so they can be synced while the
+            # rest of the org is still being listed.
+            yield from self.paginate(org.get_repos())
+            return
         # Gotta do this weird dance with users because GitHub's API doesn't
-        # support getting all accessible repos for a user, only an org.
-        public_repos = list(user.get_repos())
-        private_repos = [repo for repo in self.github.get_user().get_repos() if repo.owner.login == org_name]
-        return list(set(public_repos + private_repos))
+        # support getting all accessible repos for a user, only an org. The
+        # two listings don't depend on each other, so fetch them together.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            public_repos = executor.submit(lambda: list(self.paginate(user.get_repos())))
+            own_repos = executor.submit(lambda: list(self.paginate(self.github.get_user().get_repos())))
+            # Dedupe by name rather than through a set, which keeps the
+            # listing order and skips hashing every Repository by URL.
+            repos = {repo.full_name: repo for repo in public_repos.result()}
+            for repo in own_repos.result():
+                if repo.owner.login == org_name:
+                    repos.setdefault(repo.full_name, repo)
+        yield from repos.values()
+
+    # PaginatedList is only generic as of PyGithub 2, so keep the annotation
+    # out of reach of older versions at runtime.
+    def paginate(self, paginated_list: "PaginatedList[T]") -> Iterator[T]:
+        # Fetch pages one by one so hitting a rate limit only retries the page
+        # it happened on. The next page is requested while the caller works
+        # through the current one.
+        def get_page(page: int) -> list[T]:
+            return self.call_with_rate_limit(lambda: paginated_list.get_page(page))
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            page = 0
+            next_items = executor.submit(get_page, page)
+            while True:
+                items = next_items.result()
+                if len(items) < GITHUB_PER_PAGE:
+                    yield from items
+                    return
+                page += 1
+                next_items = executor.submit(get_page, page)
+                yield from items
 
     def get_org_repo(self, org_name: str, repo_name: str) -> Repository:
-        return self.github.get_repo(f"{org_name}/{repo_name}")
+        return self.call_with_rate_limit(lambda: self.github.get_repo(f"{org_name}/{repo_name}"))
+
+    def get_org_repo_state(self, org_name: str, repo_name: str) -> RepoState:
+        try:
+            repo = self.get_org_repo(org_name=org_name, repo_name=repo_name)
+        except UnknownObjectException:
+            return "orphaned"
+        return "archived" if repo.archived else "active"
+
+    def wait_for_rate_limit(self) -> None:
+        remaining, _ = self.github.rate_limiting
+        if remaining > GITHUB_RATE_LIMIT_THRESHOLD:
+            return
+        delay = self.github.rate_limiting_resettime - time.time()
+        if delay > 0:
+            logger.info(f"{self.provider}: {remaining} API requests left, waiting {delay:.0f}s for rate limit reset")
+            time.sleep(delay)
+
+    def call_with_rate_limit(self, func: Callable[[], T]) -> T:
+        attempt = 0
+        while True:
+            self.wait_for_rate_limit()
+            try:
+                return func()
+            except RateLimitExceededException as e:
+                attempt += 1
+                if attempt > GITHUB_RATE_LIMIT_RETRIES:
+                    raise
+                # Secondary rate limits come with a Retry-After header. Running
+                # out of the primary rate limit is handled by waiting for the
+                # reset at the top of the loop.
+                retry_after = (e.headers or {}).get("retry-after")
+                if retry_after:
+                    delay = int(retry_after)
+                elif self.github.rate_limiting[0] <= GITHUB_RATE_LIMIT_THRESHOLD:
+                    continue
+                else:
+                    delay = 60 * 2 ** (attempt - 1)
+                logger.info(f"{self.provider}: rate limited, retrying in {delay}s")
+                time.sleep(delay)
 
     def sync_all(self):
-        config_orgs: list[str] = [org for org in self.provider_config.get("orgs", default={}).keys() if org != "_"]
+        # Regex names only configure other orgs. Directory names can't start
+        # with "/", so only the configured names need filtering.
+        config_orgs: list[str] = [
+            org
+            for org in self.provider_config.get("orgs", default={}).keys()
+            if org != "_" and not org.startswith("/")
+        ]
         fs_orgs: list[str] = list(self.path_glob("*").values())
+        orgs: dict[str, bool] = {}
+        for org_name in {*config_orgs, *fs_orgs}:
+            org_enabled = self.provider_config.org(org_name).get("enabled")
+            if org_enabled is False:
+                logger.info(f"{self.provider}/{org_name}: enabled=False")
+                continue
+            orgs[org_name] = org_enabled is True
         with self.repo_processor_worker_pool.context():
-            for org_name in set(config_orgs + fs_orgs):
-                if org_name.startswith("/"):
-                    # skip regex names
-                    continue
-                org_enabled = self.provider_config.org(org_name).get("enabled")
-                if org_enabled is False:
-                    print(f"{self.provider}/{org_name}: enabled=False")
-                    continue
-                jobs = self.org_repo_processor_jobs(org_name=org_name, remote=(org_enabled is True))
-                for job in jobs:
-                    self.repo_processor_worker_pool.push(job)
+            # Listing an org is mostly waiting on the GitHub API, so list
+            # several orgs at once rather than one after the other.
+            with ThreadPoolExecutor(max_workers=self.org_concurrency()) as executor:
+                # Each org pushes its jobs as its listing comes in. A failing
+                # org is reported like a failed job and doesn't stop the rest.
+                futures = {
+                    executor.submit(self.push_org_repo_processor_jobs, org_name, remote): org_name
+                    for org_name, remote in orgs.items()
+                }
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        self.repo_processor_worker_pool.errors.append(JobError(exc=e, job=futures[future]))
+                        traceback.print_exc()
+
+    def push_org_repo_processor_jobs(self, org_name: str, remote: bool = True) -> None:
+        for job in self.org_repo_processor_jobs(org_name=org_name, remote=remote):
+            self.repo_processor_worker_pool.push(job)
+
+    def org_concurrency(self) -> int:
+        return max(1, min(self.repo_worker_pool.size, GITHUB_MAX_ORG_CONCURRENCY))
 
     def sync_path(self, path: str):
         path_parts = path.split("/")
@@ -164,7 +364,7 @@ class GitHubProvider(Provider):
 
         org_enabled = self.provider_config.org(org_name).get("enabled")
         if org_enabled is False:
-            print(f"[WARN] {self.provider}/{org_name} is disabled via config")
+            logger.warning(f"[WARN] {self.provider}/{org_name} is disabled via config")
 
         with self.repo_processor_worker_pool.context():
             if repo_name:
@@ -178,6 +378,7 @@ class GitHubProvider(Provider):
                 self.repo_processor_worker_pool.push(
                     GitHubRepoProcessorJob(
                         config=self.config,
+                        provider_config=self.provider_config,
                         push_function=self.repo_worker_pool.push,
                         repo=repo,
                         org_name=org_name,
@@ -187,50 +388,48 @@ class GitHubProvider(Provider):
                     )
                 )
             else:
-                jobs = self.org_repo_processor_jobs(org_name=org_name, remote=(org_enabled is True))
-                for job in jobs:
-                    self.repo_processor_worker_pool.push(job)
+                self.push_org_repo_processor_jobs(org_name=org_name, remote=(org_enabled is True))
 
     def org_repo_processor_jobs(
         self, org_name: str, remote: bool = True, local: bool = True
-    ) -> Iterable[GitHubRepoProcessorJob]:
-        jobs: list[GitHubRepoProcessorJob] = []
-        remote_repo_names = []
-        if remote:
-            repos = self.get_org_repos(org_name=org_name)
+    ) -> Iterator[GitHubRepoProcessorJob]:
+        remote_repo_names: set[str] = set()
+        # Scan the org directory once so jobs don't each have to stat their
+        # repo path to find out whether it has been cloned yet. The scan only
+        # touches the disk, so it runs while waiting on the org listing.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            current_repos_future = executor.submit(self.path_glob, f"{org_name}/*")
+            repos = self.get_org_repos(org_name=org_name) if remote else []
             for repo in repos:
                 state = "archived" if repo.archived else "active"
                 repo_path = self.path_join(org_name, repo.name)
-                jobs.append(
-                    GitHubRepoProcessorJob(
-                        config=self.config,
-                        push_function=self.repo_worker_pool.push,
-                        repo=repo,
-                        org_name=org_name,
-                        repo_name=repo.name,
-                        state=state,
-                        repo_path=repo_path,
-                    )
+                remote_repo_names.add(repo.name)
+                yield GitHubRepoProcessorJob(
+                    config=self.config,
+                    provider_config=self.provider_config,
+                    push_function=self.repo_worker_pool.push,
+                    repo=repo,
+                    org_name=org_name,
+                    repo_name=repo.name,
+                    state=state,
+                    repo_path=repo_path,
+                    exists_locally=repo_path in current_repos_future.result(),
                 )
-            remote_repo_names = [r.name for r in repos]
+            current_repos = current_repos_future.result()
         if local:
-            current_repos = self.path_glob(f"{org_name}/*")
             for repo_path, repo_name in current_repos.items():
                 if repo_name in remote_repo_names:
                     continue
-                try:
-                    repo = self.get_org_repo(org_name=org_name, repo_name=repo_name)
-                    state = "archived" if repo.archived else "active"
-                except UnknownObjectException:
-                    state = "orphaned"
-                jobs.append(
-                    GitHubRepoProcessorJob(
-                        config=self.config,
-                        push_function=self.repo_worker_pool.push,
-                        org_name=org_name,
-                        repo_name=repo_name,
-                        state=state,
-                        repo_path=repo_path,
-                    )
+                # Leave looking up repos missing from the listing to the
+                # processor pool so those requests run concurrently.
+                yield GitHubRepoProcessorJob(
+                    config=self.config,
+                    provider_config=self.provider_config,
+                    push_function=self.repo_worker_pool.push,
+                    org_name=org_name,
+                    repo_name=repo_name,
+                    state=None,
+                    state_function=partial(self.get_org_repo_state, org_name=org_name, repo_name=repo_name),
+                    repo_path=repo_path,
+                    exists_locally=True,
                 )
-        return jobs
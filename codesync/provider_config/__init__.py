@@ -7,13 +7,14 @@ from codesync.config import Config
 class ProviderConfig(abc.ABC):
     def __init__(self, config: Config, **kwargs) -> None:
         self.config = config
+        self._parent_cache: Optional[Tuple[Tuple[str, ...], Tuple[str, ...]]] = None
         for k, v in kwargs.items():
             setattr(self, k, v)
 
     def extend(self, **kwargs) -> "ProviderConfig":
         return self.__class__(
             **{
-                **self.__dict__,
+                **{k: v for k, v in self.__dict__.items() if not k.startswith("_")},
                 **kwargs,
             }
         )
@@ -21,9 +22,17 @@ class ProviderConfig(abc.ABC):
     def get(self, *path: Iterable[str], keys: Optional[Iterable[str]] = None, default: Any = None) -> Any:
         if keys is None:
             keys = []
-        parent_path, parent_keys = self._parent()
+        parent_path, parent_keys = self.parent()
         return self.config.get(*parent_path, *path, keys=[*parent_keys, *keys], default=default)
 
+    def parent(self) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        # A ProviderConfig never changes after it's created (extend() makes a
+        # new one), so its parent path only needs working out once.
+        if self._parent_cache is None:
+            parent_path, parent_keys = self._parent()
+            self._parent_cache = (tuple(parent_path), tuple(parent_keys))
+        return self._parent_cache
+
     @abc.abstractmethod
     def _parent(self) -> Tuple[Iterable[str], Iterable[str]]:
         return [], []
@@ -1,12 +1,24 @@
+import logging
+import time
 from dataclasses import dataclass
 from typing import Iterable, Optional
 
 from codesync import RepoAction, RepoState
-from codesync.command import run_command
 from codesync.config import Config
-from codesync.git import git_clean, git_clone, git_fetch, git_pull, repo_head_branch
+from codesync.git import (
+    git_clean,
+    git_clone,
+    git_fetch,
+    git_pull,
+    git_up_to_date,
+    repo_fetched_at,
+    repo_head_branch,
+)
+from codesync.path import remove_tree
 from codesync.worker_pool import WorkerPool
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class RepoWorkerPoolJob:
@@ -15,13 +27,14 @@ class RepoWorkerPoolJob:
     action: Optional[RepoAction]
     actions: Iterable[RepoAction]
     clean: bool
-    default_branches: Iterable[str]
+    default_branches: frozenset[str]
     exists_locally: bool
     full_name: str
     repo_clone_url: Optional[str]
     repo_name: str
     repo_path: str
     state: RepoState
+    pushed_at: Optional[float] = None
 
     def execute(self):
         provider_name = self.provider_name
@@ -35,7 +48,8 @@ class RepoWorkerPoolJob:
         exists_locally = self.exists_locally
         clean = self.clean
         default_branches = self.default_branches
-        print(f"{self.provider_name}/{full_name}: {state=!s} {action=!s} {clean=!s}")
+        branch = None
+        logger.info(f"{self.provider_name}/{full_name}: {state=!s} {action=!s} {clean=!s}")
         if action == "raise":
             raise Exception(
                 f"{full_name} needs your attention",
@@ -50,7 +64,8 @@ class RepoWorkerPoolJob:
             )
         elif action == "delete":
             if exists_locally:
-                run_command(f"rm -rf {repo_path}")
+                logger.info(f"Deleting {repo_path}")
+                remove_tree(repo_path)
         elif action == "clone":
             if not repo_clone_url:
                 raise Exception(
@@ -71,7 +86,19 @@ class RepoWorkerPoolJob:
             )
         elif action == "pull":
             branch = repo_head_branch(repo_path=repo_path)
-            if branch and branch in default_branches:
+            pull = bool(branch) and branch in default_branches
+            skip_reason = None
+            if self.remote_unchanged():
+                skip_reason = "no pushes since last fetch"
+            elif self.recently_fetched():
+                skip_reason = "fetched recently"
+            if skip_reason and pull and not git_up_to_date(repo_path=repo_path):
+                # The last fetch happened while another branch was checked
+                # out, so this one still has to catch up with its upstream.
+                skip_reason = None
+            if skip_reason:
+                logger.info(f"{self.provider_name}/{full_name}: {skip_reason}")
+            elif pull:
                 git_pull(config=self.config, repo_path=repo_path)
             elif branch is not None:
                 git_fetch(config=self.config, repo_path=repo_path)
@@ -80,7 +107,20 @@ class RepoWorkerPoolJob:
             pass
 
         if clean:
-            git_clean(repo_path=repo_path)
+            git_clean(repo_path=repo_path, head_branch=branch)
+
+    def remote_unchanged(self) -> bool:
+        if self.pushed_at is None:
+            return False
+        fetched_at = repo_fetched_at(repo_path=self.repo_path)
+        return fetched_at is not None and fetched_at > self.pushed_at
+
+    def recently_fetched(self) -> bool:
+        min_fetch_interval = self.config.get("git", "min_fetch_interval", default=0)
+        if not min_fetch_interval:
+            return False
+        fetched_at = repo_fetched_at(repo_path=self.repo_path)
+        return fetched_at is not None and time.time() - fetched_at < min_fetch_interval
 
 
 class RepoWorkerPool(WorkerPool):
@@ -14,15 +14,19 @@ class SyncedRepo:
     repo_name: str
     actions: list[RepoAction]
     state: RepoState
-    default_branches: set[str]
+    default_branches: frozenset[str]
     repo_path: str
     repo_clone_url: Optional[str] = None
     full_name: Optional[str] = None
+    pushed_at: Optional[float] = None
+    exists_locally: Optional[bool] = None
 
     def job(self) -> RepoWorkerPoolJob:
         if not self.full_name:
             self.full_name = self.repo_name
-        exists_locally = os.path.exists(self.repo_path)
+        exists_locally = self.exists_locally
+        if exists_locally is None:
+            exists_locally = os.path.exists(self.repo_path)
         if exists_locally:
             action = self.repo_action_reduce(actions=self.actions, deletes=["clean", "clone"])
         else:
@@ -41,6 +45,7 @@ class SyncedRepo:
             repo_name=self.repo_name,
             repo_path=self.repo_path,
             state=self.state,
+            pushed_at=self.pushed_at,
         )
 
     def repo_action_reduce(
@@ -44,7 +44,10 @@ class WorkerPool(abc.ABC):
             return self
         if not self.started:
             return self
-        self.queue.put(None)
+        # One sentinel per worker, so each of them stops as soon as the queue
+        # has been drained.
+        for _ in self.threads:
+            self.queue.put(None)
         self.started = False
         return self
 
@@ -66,7 +69,8 @@ class WorkerPool(abc.ABC):
         self.start()
         try:
             yield self
-        except Exception:
+        except Exception as e:
+            self.errors.append(JobError(exc=e, job=None))
             traceback.print_exc()
         finally:
             self.finish()
@@ -77,16 +81,10 @@ class WorkerPool(abc.ABC):
 
     def _consumer(self, q: queue.Queue):
         while True:
-            if self.exit:
-                break
-            try:
-                job = q.get(block=True, timeout=1)
-            except queue.Empty:
-                if self.started:
-                    continue
-                else:
-                    break
-            if job is None:
+            # Block until there's work instead of waking up every second to
+            # check on the pool; finish() sends every worker a sentinel.
+            job = q.get()
+            if job is None or self.exit:
                 break
             try:
                 self.process(job)
@@ -0,0 +1,30 @@
+import os
+import time
+
+import pytest
+
+from codesync import cache
+
+pytestmark = pytest.mark.usefixtures("cache_dir")
+
+
+class TestCache:
+    def test_round_trip(self):
+        cache.cache_write({"repos": ["a", "b"]}, "github.com", "orgs", "sapslaj.json")
+        assert cache.cache_read("github.com", "orgs", "sapslaj.json") == {"repos": ["a", "b"]}
+
+    def test_missing_entry(self):
+        assert cache.cache_read("github.com", "orgs", "nope.json") is None
+
+    def test_expired_entry(self):
+        cache.cache_write([], "github.com", "orgs", "sapslaj.json")
+        path = cache.cache_path("github.com", "orgs", "sapslaj.json")
+        stale = time.time() - 120
+        os.utime(path, (stale, stale))
+        assert cache.cache_read("github.com", "orgs", "sapslaj.json", ttl=60) is None
+        assert cache.cache_read("github.com", "orgs", "sapslaj.json") == []
+
+    def test_failed_write_leaves_no_temp_file(self, cache_dir):
+        with pytest.raises(TypeError):
+            cache.cache_write({"repos": object()}, "github.com", "orgs", "sapslaj.json")
+        assert os.listdir(cache_dir / "github.com" / "orgs") == []
@@ -0,0 +1,128 @@
+import jsonschema
+import pytest
+
+from codesync import VERSION
+from codesync.config import Config, deep_merge, flatten, regex_key_pattern, schema_validator
+
+
+class TestDeepMerge:
+    def test_merges_nested_dicts(self):
+        destination = {"git": {"clone": {"args": []}, "pull": {"args": []}}, "src_dir": "~/src"}
+        source = {"git": {"clone": {"args": ["--depth", "1"]}}, "src_dir": "~/code"}
+        assert deep_merge(destination, source) == {
+            "git": {"clone": {"args": ["--depth", "1"]}, "pull": {"args": []}},
+            "src_dir": "~/code",
+        }
+
+    def test_replaces_non_dict_values(self):
+        assert deep_merge({"a": {"b": 1}, "c": [1]}, {"a": 2, "c": [2]}) == {"a": 2, "c": [2]}
+
+
+class TestFlatten:
+    def test_indexes_every_path(self):
+        config = {"a": {"b": {"c": 1}}, "d": [1, 2]}
+        assert flatten(config) == {
+            (): config,
+            ("a",): {"b": {"c": 1}},
+            ("a", "b"): {"c": 1},
+            ("a", "b", "c"): 1,
+            ("d",): [1, 2],
+        }
+
+
+class TestRegexKeyPattern:
+    def test_compiles_pattern_with_flags(self):
+        assert regex_key_pattern("/foo.*/i").fullmatch("FOOBAR")
+
+    def test_keeps_slashes_in_pattern(self):
+        assert regex_key_pattern("/a/b/").fullmatch("a/b")
+
+    def test_reuses_compiled_pattern(self):
+        assert regex_key_pattern("/x+/") is regex_key_pattern("/x+/")
+
+
+class TestConfig:
+    config = Config(
+        config={
+            "version": 0.8,
+            "providers": {
+                "generic": {
+                    "repos": {
+                        "/.*/": {"enabled": False, "default_branch": "main"},
+                        "/test-.*/i": {"enabled": True},
+                        "codesync": {"default_branch": "master"},
+                    },
+                },
+            },
+        }
+    )
+
+    class TestRegexKeys:
+        def test_most_specific_first(self):
+            regex_keys = TestConfig.config.regex_keys("providers", "generic", "repos")
+            assert [key for key, _ in regex_keys] == ["/test-.*/i", "/.*/"]
+
+        def test_not_a_dict(self):
+            assert TestConfig.config.regex_keys("version") == []
+
+    class TestGetRaw:
+        def test_existing_path(self):
+            assert TestConfig.config.get_raw("providers", "generic", "repos", "codesync", "default_branch") == "master"
+
+        def test_missing_path(self):
+            assert TestConfig.config.get_raw("providers", "github.com", default="nope") == "nope"
+
+        def test_path_through_leaf(self):
+            assert TestConfig.config.get_raw("version", "nope", default="nope") == "nope"
+
+    class TestGet:
+        def test_exact_key(self):
+            assert (
+                TestConfig.config.get("providers", "generic", "repos", "{}", "default_branch", keys=["codesync"])
+                == "master"
+            )
+
+        def test_regex_key(self):
+            assert TestConfig.config.get("providers", "generic", "repos", "{}", "enabled", keys=["other"]) is False
+
+        def test_most_specific_regex_key_with_flags(self):
+            assert TestConfig.config.get("providers", "generic", "repos", "{}", "enabled", keys=["TEST-repo"]) is True
+
+        def test_missing_key(self):
+            assert (
+                TestConfig.config.get(
+                    "providers", "generic", "repos", "{}", "clone_scheme", keys=["other"], default="ssh"
+                )
+                == "ssh"
+            )
+
+        def test_repeated_lookup_is_cached(self):
+            config = Config(config={"repos": {"/.*/": {"enabled": True}}})
+            assert config.get("repos", "{}", "enabled", keys=["codesync"]) is True
+            config.config["repos"]["/.*/"]["enabled"] = False
+            assert config.get("repos", "{}", "enabled", keys=["codesync"]) is True
+
+        def test_cached_miss_uses_caller_default(self):
+            config = Config(config={"repos": {}})
+            assert config.get("repos", "{}", "enabled", keys=["codesync"]) is None
+            assert config.get("repos", "{}", "enabled", keys=["codesync"], default=False) is False
+
+
+class TestSchemaValidator:
+    def test_reuses_validator(self):
+        assert schema_validator(VERSION) is schema_validator(VERSION)
+
+    def test_rejects_invalid_config(self):
+        with pytest.raises(jsonschema.ValidationError):
+            Config({"version": VERSION, "concurrency": "lots"}).validate()
+
+
+class TestLoadConfigFile:
+    def test_parses_yaml_1_2(self, tmp_path):
+        # YAML 1.1 would turn these org names into booleans.
+        config_file = tmp_path / "codesync.yaml"
+        config_file.write_text("providers:\n  github.com:\n    orgs:\n      no: {enabled: yes}\n      on: {}\n")
+        config = Config({"version": VERSION})
+        config.load_config_file(str(config_file))
+        assert config.get("providers", "github.com", "orgs", "no") == {"enabled": "yes"}
+        assert config.get("providers", "github.com", "orgs", "on") == {}
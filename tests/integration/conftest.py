@@ -0,0 +1,17 @@
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from codesync import cache
+
+
+@pytest.fixture
+def cache_dir(monkeypatch) -> Iterator[Path]:
+    # Not under tmp_path, which is too long a path for SSH control sockets.
+    path = tempfile.mkdtemp(prefix="cs")
+    monkeypatch.setattr(cache, "DEFAULT_CACHE_DIR", path)
+    yield Path(path)
+    shutil.rmtree(path)
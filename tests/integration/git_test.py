@@ -0,0 +1,90 @@
+import os
+import subprocess
+
+import pytest
+
+from codesync import cache
+from codesync.config import Config
+from codesync.git import _git_env, _user_ssh_command_configured, git_clean, repo_head_branch
+
+
+class TestRepoHeadBranch:
+    @pytest.mark.parametrize(
+        ("head", "expected_branch"),
+        [
+            ("ref: refs/heads/main\n", "main"),
+            ("ref: refs/heads/feature/some-thing\n", "feature/some-thing"),
+            ("ref: refs/heads/main", "main"),
+            ("0123456789abcdef0123456789abcdef01234567\n", None),
+        ],
+    )
+    def test_returns_branch(self, tmp_path, head: str, expected_branch: str):
+        (tmp_path / ".git").mkdir()
+        (tmp_path / ".git" / "HEAD").write_text(head)
+        assert repo_head_branch(str(tmp_path)) == expected_branch
+
+
+@pytest.mark.usefixtures("cache_dir")
+class TestGitEnv:
+    @pytest.fixture(autouse=True)
+    def git_config(self, tmp_path, monkeypatch):
+        monkeypatch.delenv("GIT_SSH_COMMAND", raising=False)
+        monkeypatch.delenv("GIT_SSH", raising=False)
+        global_config = tmp_path / "gitconfig"
+        global_config.touch()
+        monkeypatch.setenv("GIT_CONFIG_GLOBAL", str(global_config))
+        monkeypatch.setenv("GIT_CONFIG_NOSYSTEM", "1")
+        _user_ssh_command_configured.cache_clear()
+        yield
+        _user_ssh_command_configured.cache_clear()
+
+    def test_disabled_by_default(self):
+        assert _git_env(Config()) is None
+
+    def test_multiplexes_ssh(self, cache_dir):
+        env = _git_env(Config({"git": {"ssh": {"multiplex": True}}}))
+        assert env is not None
+        assert "ControlMaster=auto" in env["GIT_SSH_COMMAND"]
+        assert f"ControlPath={os.path.join(cache_dir, 'ssh', '%C')}" in env["GIT_SSH_COMMAND"]
+        assert os.path.isdir(os.path.join(cache_dir, "ssh"))
+
+    def test_keeps_user_ssh_command(self, monkeypatch):
+        monkeypatch.setenv("GIT_SSH_COMMAND", "ssh -i key")
+        assert _git_env(Config({"git": {"ssh": {"multiplex": True}}})) is None
+
+    def test_keeps_git_configured_ssh_command(self, tmp_path):
+        (tmp_path / "gitconfig").write_text("[core]\n\tsshCommand = ssh -i key\n")
+        assert _git_env(Config({"git": {"ssh": {"multiplex": True}}})) is None
+
+    def test_keeps_repo_configured_ssh_command(self, tmp_path):
+        (tmp_path / "repo" / ".git").mkdir(parents=True)
+        (tmp_path / "repo" / ".git" / "config").write_text("[core]\n\tbare = false\n\tsshCommand = ssh -i key\n")
+        config = Config({"git": {"ssh": {"multiplex": True}}})
+        assert _git_env(config, repo_path=str(tmp_path / "repo")) is None
+        assert _git_env(config) is not None
+
+    def test_skips_control_path_that_is_too_long(self, monkeypatch, cache_dir):
+        monkeypatch.setattr(cache, "DEFAULT_CACHE_DIR", os.path.join(cache_dir, "x" * 64))
+        assert _git_env(Config({"git": {"ssh": {"multiplex": True}}})) is None
+
+
+class TestGitClean:
+    def git(self, *args: str) -> None:
+        subprocess.run(["git", *args], check=True, capture_output=True)
+
+    def test_deletes_gone_branches(self, tmp_path):
+        origin, clone = str(tmp_path / "origin"), str(tmp_path / "clone")
+        self.git("init", "-q", "-b", "main", origin)
+        self.git("-C", origin, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "--allow-empty", "-m", "x")
+        for branch in ("gone-1", "gone-2", "kept"):
+            self.git("-C", origin, "branch", branch)
+        self.git("clone", "-q", origin, clone)
+        for branch in ("gone-1", "gone-2", "kept"):
+            self.git("-C", clone, "branch", "-q", "--track", branch, f"origin/{branch}")
+        self.git("-C", origin, "branch", "-q", "-D", "gone-1", "gone-2")
+        self.git("-C", clone, "fetch", "-q", "-p")
+
+        git_clean(repo_path=clone)
+
+        branches = subprocess.check_output(["git", "-C", clone, "branch", "--format", "%(refname:short)"])
+        assert branches.decode("utf-8").split() == ["kept", "main"]
@@ -0,0 +1,94 @@
+import os
+from glob import glob
+from pathlib import Path
+
+import pytest
+
+from codesync.path import path_glob, remove_tree, scandir_many
+
+
+@pytest.fixture
+def src_dir(tmp_path):
+    for name in ["codesync", "dotfiles", ".hidden", "test-repo"]:
+        (tmp_path / name).mkdir()
+    (tmp_path / "README.md").write_text("")
+    os.symlink(tmp_path / "codesync", tmp_path / "linked")
+    return str(tmp_path)
+
+
+class TestPathGlob:
+    def test_matches_glob(self, src_dir):
+        for pattern in ["*", "test-*", "*s*", ".*", "codesync", "README.md", "nope", "*/"]:
+            path = os.path.join(src_dir, pattern)
+            expected = {d: os.path.split(d)[-1] for d in glob(path) if os.path.isdir(d)}
+            assert path_glob(path) == expected, pattern
+
+    def test_lists_directories(self, src_dir):
+        assert sorted(path_glob(os.path.join(src_dir, "*")).values()) == [
+            "codesync",
+            "dotfiles",
+            "linked",
+            "test-repo",
+        ]
+
+    def test_matches_glob_with_magic_parent(self, src_dir):
+        (Path(src_dir) / "dotfiles" / "nested").mkdir()
+        (Path(src_dir) / "test-repo" / "nested").mkdir()
+        (Path(src_dir) / "test-repo" / "file").write_text("")
+        for pattern in ["*/*", "*/nes*", "t*/*", "*/file"]:
+            path = os.path.join(src_dir, pattern)
+            expected = {d: os.path.split(d)[-1] for d in glob(path) if os.path.isdir(d)}
+            assert path_glob(path) == expected, pattern
+
+    def test_missing_parent(self, src_dir):
+        assert path_glob(os.path.join(src_dir, "nope", "*")) == {}
+
+
+class TestScandirMany:
+    def test_lists_each_path(self, src_dir):
+        (Path(src_dir) / "dotfiles" / "nested").mkdir()
+        paths = [os.path.join(src_dir, "dotfiles"), os.path.join(src_dir, "test-repo")]
+        assert scandir_many(paths, max_workers=2) == {
+            paths[0]: {os.path.join(paths[0], "nested"): "nested"},
+            paths[1]: {},
+        }
+
+
+class TestRemoveTree:
+    def test_removes_tree(self, tmp_path):
+        objects = tmp_path / "repo" / ".git" / "objects"
+        objects.mkdir(parents=True)
+        (objects / "pack").write_text("")
+        remove_tree(str(tmp_path / "repo"))
+        assert not (tmp_path / "repo").exists()
+
+    @pytest.mark.skipif(not hasattr(os, "geteuid") or os.geteuid() == 0, reason="root ignores file permissions")
+    def test_removes_read_only_directories(self, tmp_path):
+        pack = tmp_path / "repo" / ".git" / "objects" / "pack"
+        pack.mkdir(parents=True)
+        (pack / "pack-0123.pack").write_text("")
+        (pack / "pack-0123.pack").chmod(0o444)
+        pack.chmod(0o555)
+        remove_tree(str(tmp_path / "repo"))
+        assert not (tmp_path / "repo").exists()
+
+    @pytest.mark.skipif(not hasattr(os, "geteuid") or os.geteuid() == 0, reason="root ignores file permissions")
+    def test_removes_unlistable_directories(self, tmp_path):
+        locked = tmp_path / "repo" / "locked"
+        locked.mkdir(parents=True)
+        (locked / "file").write_text("")
+        locked.chmod(0o000)
+        remove_tree(str(tmp_path / "repo"))
+        assert not (tmp_path / "repo").exists()
+
+    def test_removes_only_the_symlink(self, tmp_path):
+        (tmp_path / "elsewhere").mkdir()
+        (tmp_path / "elsewhere" / "file").write_text("")
+        (tmp_path / "linked").symlink_to(tmp_path / "elsewhere")
+        remove_tree(str(tmp_path / "linked"))
+        assert not os.path.lexists(tmp_path / "linked")
+        assert (tmp_path / "elsewhere" / "file").exists()
+
+    def test_raises_for_missing_path(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            remove_tree(str(tmp_path / "missing"))
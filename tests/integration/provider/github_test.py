@@ -0,0 +1,239 @@
+from types import SimpleNamespace
+from typing import Any, Callable, Optional
+
+import pytest
+from github import Github, RateLimitExceededException
+from github.Repository import Repository
+
+from codesync.config import Config
+from codesync.provider import github
+from codesync.provider.github import (
+    GITHUB_PER_PAGE,
+    GITHUB_RATE_LIMIT_RETRIES,
+    GitHubProvider,
+    github_timestamp,
+    repo_topics,
+)
+from codesync.repo.repo_worker_pool import RepoWorkerPool
+
+
+def make_provider(config: Optional[Config] = None) -> GitHubProvider:
+    return GitHubProvider(config=config or Config(), path="/nonexistent", repo_worker_pool=RepoWorkerPool(size=0))
+
+
+def make_repo(name: str, owner: str = "sapslaj") -> Repository:
+    return Github().create_from_raw_data(
+        Repository,
+        {
+            "name": name,
+            "full_name": f"{owner}/{name}",
+            "owner": {"login": owner},
+            "url": f"https://api.github.com/repos/{owner}/{name}",
+            "archived": False,
+            "clone_url": f"https://github.com/{owner}/{name}.git",
+            "ssh_url": f"git@github.com:{owner}/{name}.git",
+            "topics": [],
+            "pushed_at": "2024-01-01T00:00:00Z",
+        },
+    )
+
+
+class FakeGithub:
+    def __init__(self, remaining: int = 5000) -> None:
+        self.rate_limiting = (remaining, 5000)
+        self.rate_limiting_resettime = FakeTime.now + 30
+
+
+class FakeTime:
+    now = 1000.0
+
+    def __init__(self) -> None:
+        self.sleeps: list[float] = []
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, delay: float) -> None:
+        self.sleeps.append(delay)
+
+
+class FakePaginatedList:
+    def __init__(self, pages: list[list[Any]]) -> None:
+        self.pages = pages
+        self.requested: list[int] = []
+
+    def get_page(self, page: int) -> list[Any]:
+        self.requested.append(page)
+        return self.pages[page]
+
+
+def rate_limited(retry_after: Optional[str] = None) -> RateLimitExceededException:
+    return RateLimitExceededException(403, {}, {"retry-after": retry_after} if retry_after else {})
+
+
+def fail_times(times: int, exc: Callable[[], Exception], result: Any = "ok") -> Callable[[], Any]:
+    calls = iter(range(times + 1))
+
+    def func():
+        if next(calls) < times:
+            raise exc()
+        return result
+
+    return func
+
+
+# PyGithub before 1.56 only offers topics through a separate API request.
+requires_listed_topics = pytest.mark.skipif(not hasattr(Repository, "topics"), reason="needs PyGithub>=1.56")
+
+
+@pytest.fixture
+def fake_time(monkeypatch) -> FakeTime:
+    fake_time = FakeTime()
+    monkeypatch.setattr(github, "time", fake_time)
+    return fake_time
+
+
+class TestRepoTopics:
+    @requires_listed_topics
+    def test_uses_listed_topics(self):
+        repo = Github().create_from_raw_data(Repository, {"name": "codesync", "topics": ["git"]})
+        assert repo_topics(repo) == ["git"]
+
+    def test_falls_back_to_topics_request(self):
+        # PyGithub before 1.56 has no topics attribute on Repository.
+        class OldRepository:
+            def get_topics(self) -> list[str]:
+                return ["git"]
+
+        assert repo_topics(OldRepository()) == ["git"]  # type: ignore
+
+
+@pytest.mark.usefixtures("cache_dir")
+class TestGetOrgRepos:
+    def config(self) -> Config:
+        return Config({"providers": {"github.com": {"cache": {"ttl": 600}}}})
+
+    def test_survives_cache_write_failure(self, monkeypatch):
+        provider = make_provider(self.config())
+        monkeypatch.setattr(provider, "fetch_org_repos", lambda org_name: iter([make_repo("codesync")]))
+
+        def cache_write(*args, **kwargs):
+            raise OSError("read-only file system")
+
+        monkeypatch.setattr(github, "cache_write", cache_write)
+        assert [repo.name for repo in provider.get_org_repos("sapslaj")] == ["codesync"]
+
+    @requires_listed_topics
+    def test_round_trips_cached_listing(self, monkeypatch):
+        provider = make_provider(self.config())
+        repos = [make_repo("codesync"), make_repo("dotfiles")]
+        monkeypatch.setattr(provider, "fetch_org_repos", lambda org_name: iter(repos))
+        list(provider.get_org_repos("sapslaj"))
+
+        monkeypatch.setattr(provider, "fetch_org_repos", lambda org_name: pytest.fail("listing was not cached"))
+        cached = list(provider.get_org_repos("sapslaj"))
+        assert [provider.repo_cache_data(repo) for repo in cached] == [
+            provider.repo_cache_data(repo) for repo in repos
+        ]
+        assert [github_timestamp(repo.pushed_at) for repo in cached] == [
+            github_timestamp(repo.pushed_at) for repo in repos
+        ]
+
+
+class TestCallWithRateLimit:
+    def test_returns_result(self, fake_time):
+        provider = make_provider()
+        provider.github = FakeGithub()  # type: ignore
+        assert provider.call_with_rate_limit(lambda: "ok") == "ok"
+        assert fake_time.sleeps == []
+
+    def test_waits_for_rate_limit_reset(self, fake_time):
+        provider = make_provider()
+        provider.github = FakeGithub(remaining=0)  # type: ignore
+        assert provider.call_with_rate_limit(lambda: "ok") == "ok"
+        assert fake_time.sleeps == [30]
+
+    def test_honors_retry_after(self, fake_time):
+        provider = make_provider()
+        provider.github = FakeGithub()  # type: ignore
+        assert provider.call_with_rate_limit(fail_times(1, lambda: rate_limited(retry_after="5"))) == "ok"
+        assert fake_time.sleeps == [5]
+
+    def test_backs_off_exponentially(self, fake_time):
+        provider = make_provider()
+        provider.github = FakeGithub()  # type: ignore
+        assert provider.call_with_rate_limit(fail_times(2, rate_limited)) == "ok"
+        assert fake_time.sleeps == [60, 120]
+
+    def test_waits_for_reset_once_rate_limit_is_used_up(self, fake_time):
+        provider = make_provider()
+        fake_github = FakeGithub()
+        provider.github = fake_github  # type: ignore
+
+        def use_up_rate_limit() -> RateLimitExceededException:
+            fake_github.rate_limiting = (0, 5000)
+            return rate_limited()
+
+        assert provider.call_with_rate_limit(fail_times(1, use_up_rate_limit)) == "ok"
+        assert fake_time.sleeps == [30]
+
+    def test_gives_up_after_retries(self, fake_time):
+        provider = make_provider()
+        provider.github = FakeGithub()  # type: ignore
+        with pytest.raises(RateLimitExceededException):
+            provider.call_with_rate_limit(fail_times(GITHUB_RATE_LIMIT_RETRIES + 1, rate_limited))
+        assert len(fake_time.sleeps) == GITHUB_RATE_LIMIT_RETRIES
+
+
+class TestPaginate:
+    @pytest.fixture
+    def provider(self, fake_time) -> GitHubProvider:
+        provider = make_provider()
+        provider.github = FakeGithub()  # type: ignore
+        return provider
+
+    def test_stops_on_short_page(self, provider):
+        pages = FakePaginatedList([list(range(GITHUB_PER_PAGE)), list(range(GITHUB_PER_PAGE)), [0, 1, 2]])
+        assert len(list(provider.paginate(pages))) == 2 * GITHUB_PER_PAGE + 3
+        assert pages.requested == [0, 1, 2]
+
+    def test_stops_on_empty_page(self, provider):
+        pages = FakePaginatedList([list(range(GITHUB_PER_PAGE)), []])
+        assert len(list(provider.paginate(pages))) == GITHUB_PER_PAGE
+        assert pages.requested == [0, 1]
+
+
+class TestFetchOrgRepos:
+    def test_dedupes_user_repos(self, fake_time):
+        provider = make_provider()
+        public_repos = [make_repo("codesync"), make_repo("dotfiles")]
+        own_repos = [make_repo("dotfiles"), make_repo("private"), make_repo("fork", owner="someone-else")]
+        users = {
+            "sapslaj": SimpleNamespace(type="User", get_repos=lambda: FakePaginatedList([public_repos])),
+            None: SimpleNamespace(type="User", get_repos=lambda: FakePaginatedList([own_repos])),
+        }
+        fake_github = FakeGithub()
+        fake_github.get_user = lambda login=None: users[login]  # type: ignore
+        provider.github = fake_github  # type: ignore
+        assert [repo.full_name for repo in provider.fetch_org_repos("sapslaj")] == [
+            "sapslaj/codesync",
+            "sapslaj/dotfiles",
+            "sapslaj/private",
+        ]
+
+
+class TestSyncAll:
+    def test_failing_orgs_dont_stop_the_rest(self, monkeypatch):
+        orgs = {org_name: {"enabled": True} for org_name in ("broken", "good", "typo")}
+        provider = make_provider(Config({"providers": {"github.com": {"orgs": orgs}}}))
+        synced: list[str] = []
+
+        def push_org_repo_processor_jobs(org_name: str, remote: bool = True) -> None:
+            if org_name != "good":
+                raise Exception(f"{org_name} failed")
+            synced.append(org_name)
+
+        monkeypatch.setattr(provider, "push_org_repo_processor_jobs", push_org_repo_processor_jobs)
+        provider.sync_all()
+        assert synced == ["good"]
+        assert sorted(error.job for error in provider.repo_worker_pool.errors) == ["broken", "typo"]
@@ -0,0 +1,132 @@
+import os
+import subprocess
+import time
+from dataclasses import replace
+from typing import Optional
+
+import pytest
+
+from codesync.config import Config
+from codesync.repo import repo_worker_pool
+from codesync.repo.repo_worker_pool import RepoWorkerPoolJob
+
+
+def make_job(repo_path: str, pushed_at: Optional[float], config: Optional[Config] = None) -> RepoWorkerPoolJob:
+    return RepoWorkerPoolJob(
+        config=config or Config(),
+        provider_name="test",
+        action="pull",
+        actions=["pull"],
+        clean=False,
+        default_branches=frozenset(["main"]),
+        exists_locally=True,
+        full_name="test",
+        repo_clone_url=None,
+        repo_name="test",
+        repo_path=repo_path,
+        state="active",
+        pushed_at=pushed_at,
+    )
+
+
+@pytest.fixture
+def repo_path(tmp_path) -> str:
+    (tmp_path / ".git").mkdir()
+    return str(tmp_path)
+
+
+def fetch(repo_path: str, at: float) -> None:
+    fetch_head = os.path.join(repo_path, ".git", "FETCH_HEAD")
+    with open(fetch_head, "w"):
+        pass
+    os.utime(fetch_head, (at, at))
+
+
+class TestRepoWorkerPoolJob:
+    class TestRemoteUnchanged:
+        def test_without_pushed_at(self, repo_path):
+            fetch(repo_path, at=2000)
+            assert not make_job(repo_path, pushed_at=None).remote_unchanged()
+
+        def test_never_fetched(self, repo_path):
+            assert not make_job(repo_path, pushed_at=1000).remote_unchanged()
+
+        def test_fetched_after_push(self, repo_path):
+            fetch(repo_path, at=2000)
+            assert make_job(repo_path, pushed_at=1000).remote_unchanged()
+
+        def test_pushed_after_fetch(self, repo_path):
+            fetch(repo_path, at=1000)
+            assert not make_job(repo_path, pushed_at=2000).remote_unchanged()
+
+    class TestRecentlyFetched:
+        def config(self, min_fetch_interval: float) -> Config:
+            return Config({"git": {"min_fetch_interval": min_fetch_interval}})
+
+        def test_disabled(self, repo_path):
+            fetch(repo_path, at=time.time() - 10)
+            assert not make_job(repo_path, pushed_at=None).recently_fetched()
+
+        def test_never_fetched(self, repo_path):
+            assert not make_job(repo_path, pushed_at=None, config=self.config(300)).recently_fetched()
+
+        def test_fetched_within_interval(self, repo_path):
+            fetch(repo_path, at=time.time() - 10)
+            assert make_job(repo_path, pushed_at=None, config=self.config(300)).recently_fetched()
+
+        def test_fetched_before_interval(self, repo_path):
+            fetch(repo_path, at=time.time() - 600)
+            assert not make_job(repo_path, pushed_at=None, config=self.config(300)).recently_fetched()
+
+    class TestExecutePull:
+        def git(self, *args: str) -> str:
+            return subprocess.check_output(["git", *args], stderr=subprocess.DEVNULL).decode("utf-8").strip()
+
+        def commit(self, repo_path: str) -> None:
+            self.git(
+                "-C",
+                repo_path,
+                "-c",
+                "user.name=t",
+                "-c",
+                "user.email=t@t",
+                "commit",
+                "-q",
+                "--allow-empty",
+                "-m",
+                "x",
+            )
+
+        @pytest.fixture
+        def repos(self, tmp_path):
+            origin, clone = str(tmp_path / "origin"), str(tmp_path / "clone")
+            self.git("init", "-q", "-b", "main", origin)
+            self.commit(origin)
+            self.git("clone", "-q", origin, clone)
+            return origin, clone
+
+        def test_skips_pull_when_up_to_date(self, repos, monkeypatch):
+            _, clone = repos
+            self.git("-C", clone, "fetch", "-q")
+            monkeypatch.setattr(repo_worker_pool, "git_pull", lambda **_: pytest.fail("pulled an unchanged repo"))
+            make_job(clone, pushed_at=time.time() - 60).execute()
+
+        def test_pulls_branch_behind_last_fetch(self, repos):
+            # Fetched while on another branch, so main never caught up.
+            origin, clone = repos
+            self.git("-C", clone, "checkout", "-q", "-b", "feature")
+            self.commit(origin)
+            self.git("-C", clone, "fetch", "-q")
+            self.git("-C", clone, "checkout", "-q", "main")
+            make_job(clone, pushed_at=time.time() - 60).execute()
+            assert self.git("-C", clone, "rev-parse", "main") == self.git("-C", origin, "rev-parse", "main")
+
+    class TestExecuteDelete:
+        def test_deletes_symlinked_repo(self, tmp_path):
+            # Like rm -rf, only the link goes away, not what it points to.
+            (tmp_path / "elsewhere" / ".git").mkdir(parents=True)
+            (tmp_path / "linked").symlink_to(tmp_path / "elsewhere")
+            job = make_job(str(tmp_path / "linked"), pushed_at=None)
+            replace(job, action="delete", actions=["delete"], state="archived").execute()
+            assert not os.path.lexists(tmp_path / "linked")
+            assert (tmp_path / "elsewhere" / ".git").is_dir()
@@ -28,7 +28,30 @@ class TestSyncedRepo:
                 repo_name="test",
                 actions=actions,
                 state="active",
-                default_branches=set(),
+                default_branches=frozenset(),
                 repo_path="test",
             )
             assert repo.repo_action_reduce(actions=actions, deletes=deletes) == expected_action
+
+    class TestJob:
+        @pytest.mark.parametrize(
+            ("exists_locally", "expected_action"),
+            [
+                (True, "pull"),
+                (False, "clone"),
+            ],
+        )
+        def test_uses_known_local_state(self, exists_locally: bool, expected_action: RepoAction):
+            repo = SyncedRepo(
+                config=Config(),
+                provider_name="test",
+                repo_name="test",
+                actions=["pull", "clone"],
+                state="active",
+                default_branches=frozenset(),
+                repo_path="/nonexistent/test",
+                exists_locally=exists_locally,
+            )
+            job = repo.job()
+            assert job.exists_locally is exists_locally
+            assert job.action == expected_action
@@ -0,0 +1,42 @@
+from typing import Any
+
+import pytest
+
+from codesync.worker_pool import WorkerPool
+
+
+class RecordingWorkerPool(WorkerPool):
+    def __init__(self, size: int) -> None:
+        super().__init__(size=size)
+        self.processed: list[Any] = []
+
+    def process(self, job: Any):
+        if job == "fail":
+            raise Exception("job failed")
+        self.processed.append(job)
+
+
+class TestWorkerPool:
+    @pytest.mark.parametrize("size", [0, 1, 4])
+    def test_processes_every_job(self, size: int):
+        pool = RecordingWorkerPool(size=size)
+        with pool.context():
+            for i in range(20):
+                pool.push(i)
+        assert sorted(pool.processed) == list(range(20))
+        assert pool.errors == []
+
+    def test_records_job_errors(self):
+        pool = RecordingWorkerPool(size=2)
+        with pool.context():
+            pool.push("fail")
+            pool.push(1)
+        assert pool.processed == [1]
+        assert [error.job for error in pool.errors] == ["fail"]
+
+    def test_records_context_errors(self):
+        pool = RecordingWorkerPool(size=2)
+        with pool.context():
+            raise Exception("listing failed")
+        assert len(pool.errors) == 1
+        assert pool.errors[0].job is None